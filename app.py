@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
 from io import BytesIO
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gc
 import time
 
 # Import our PDF processor module
@@ -56,30 +55,155 @@ MAX_FILES = 30  # Maximum number of files to process
 # Initialize session state variables if they don't exist
 if 'uploaded_files' not in st.session_state:
     st.session_state.uploaded_files = []
+if 'uploaded_names' not in st.session_state:
+    st.session_state.uploaded_names = set()
 if 'file_hashes' not in st.session_state:
     st.session_state.file_hashes = set()
 if 'extracted_data' not in st.session_state:
     st.session_state.extracted_data = []
+if 'data_df' not in st.session_state:
+    st.session_state.data_df = None
 if 'uploader_key' not in st.session_state:
     st.session_state.uploader_key = int(time.time())
 
+@st.cache_data(max_entries=128, show_spinner=False)
+def _cached_process(file_hash, file_bytes):
+    """Process PDF content, cached on the file hash across reruns and sessions"""
+    return pdf_processor._process_pdf_core(file_bytes)
+
+@st.cache_data(show_spinner=False)
+def _build_trend_fig(data_df):
+    """Build the performance-trend line chart, cached on the data content"""
+    # Deferred so the initial page render doesn't pay the plotly import cost
+    import plotly.express as px
+
+    # Reshape to long format for the line chart; a manual concat of the three
+    # fixed indicator columns is faster than pd.melt on these small frames
+    melted_df = pd.concat(
+        [
+            pd.DataFrame({
+                'period_label': data_df['period_label'],
+                'Indicator': indicator,
+                'Count': data_df[indicator].values
+            })
+            for indicator in ('Very Good', 'Good', 'Needs Improvement')
+        ],
+        ignore_index=True
+    )
+
+    fig = px.line(
+        melted_df,
+        x='period_label',
+        y='Count',
+        color='Indicator',
+        markers=True,
+        title="Performance Indicators Over Time",
+        labels={'period_label': 'Reporting Period', 'Count': 'Number of Occurrences'},
+        color_discrete_map={
+            'Very Good': '#4CAF50',
+            'Good': '#2196F3',
+            'Needs Improvement': '#FF9800'
+        }
+    )
+
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        xaxis=dict(tickangle=45)
+    )
+
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _build_period_fig(data_df):
+    """Build the grouped per-period bar chart, cached on the data content"""
+    import plotly.express as px
+
+    fig = px.bar(
+        data_df,
+        x='period_label',
+        y=['Very Good', 'Good', 'Needs Improvement'],
+        title="Performance Indicators by Reporting Period",
+        labels={'period_label': 'Reporting Period', 'value': 'Count', 'variable': 'Indicator'},
+        barmode='group',
+        color_discrete_map={
+            'Very Good': '#4CAF50',
+            'Good': '#2196F3',
+            'Needs Improvement': '#FF9800'
+        }
+    )
+
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        xaxis=dict(tickangle=45)
+    )
+
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _build_pct_fig(data_df):
+    """Build the stacked percentage-distribution chart, cached on the data content"""
+    import plotly.express as px
+
+    # Calculate percentages with vectorized column arithmetic
+    data_df_pct = data_df.copy()
+    indicator_cols = ['Very Good', 'Good', 'Needs Improvement']
+    totals = data_df_pct[indicator_cols].sum(axis=1).replace(0, np.nan)
+    data_df_pct[indicator_cols] = data_df_pct[indicator_cols].div(totals, axis=0).mul(100).fillna(0)
+
+    fig = px.bar(
+        data_df_pct,
+        x='period_label',
+        y=['Very Good', 'Good', 'Needs Improvement'],
+        title="Percentage Distribution of Performance Indicators",
+        labels={'period_label': 'Reporting Period', 'value': 'Percentage', 'variable': 'Indicator'},
+        barmode='stack',
+        color_discrete_map={
+            'Very Good': '#4CAF50',
+            'Good': '#2196F3',
+            'Needs Improvement': '#FF9800'
+        }
+    )
+
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        xaxis=dict(tickangle=45),
+        yaxis=dict(ticksuffix="%")
+    )
+
+    return fig
+
 def generate_charts(data_df):
     """Generate charts based on the extracted data"""
     if data_df.empty:
         return
     
-    # Convert year, semester, and report_number to numeric for proper sorting
-    data_df['year'] = pd.to_numeric(data_df['year'])
-    data_df['semester'] = pd.to_numeric(data_df['semester'])
-    data_df['report_number'] = pd.to_numeric(data_df['report_number'])
-    
+    # year, semester, and report_number are already numeric, so sorting works directly
     # Sort DataFrame by year, semester, and report_number
     data_df = data_df.sort_values(by=['year', 'semester', 'report_number'])
     
     # Create a column with period labels for x-axis
-    data_df['period_label'] = data_df.apply(
-        lambda row: f"{row['year']} S{row['semester']} R{row['report_number']}", 
-        axis=1
+    data_df['period_label'] = (
+        data_df['year'].astype(str)
+        + ' S' + data_df['semester'].astype(str)
+        + ' R' + data_df['report_number'].astype(str)
     )
     
     # Create tabs for different visualizations
@@ -87,44 +211,9 @@ def generate_charts(data_df):
     
     with tab1:
         st.markdown('<div class="sub-header">Performance Indicator Trends Over Time</div>', unsafe_allow_html=True)
-        
-        # Melt the DataFrame to create a format suitable for line chart
-        melted_df = pd.melt(
-            data_df, 
-            id_vars=['period_label'], 
-            value_vars=['Very Good', 'Good', 'Needs Improvement'],
-            var_name='Indicator', 
-            value_name='Count'
-        )
-        
-        # Create line chart with Plotly
-        fig = px.line(
-            melted_df, 
-            x='period_label', 
-            y='Count', 
-            color='Indicator',
-            markers=True,
-            title="Performance Indicators Over Time",
-            labels={'period_label': 'Reporting Period', 'Count': 'Number of Occurrences'},
-            color_discrete_map={
-                'Very Good': '#4CAF50',
-                'Good': '#2196F3',
-                'Needs Improvement': '#FF9800'
-            }
-        )
-        
-        fig.update_layout(
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            xaxis=dict(tickangle=45)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+
+        # Create line chart with Plotly (cached on the data content)
+        st.plotly_chart(_build_trend_fig(data_df), use_container_width=True)
         
         # Add a summary section
         st.markdown('<div class="info-box">', unsafe_allow_html=True)
@@ -154,78 +243,15 @@ def generate_charts(data_df):
     
     with tab2:
         st.markdown('<div class="sub-header">Performance Indicators by Reporting Period</div>', unsafe_allow_html=True)
-        
-        # Create a grouped bar chart
-        fig = px.bar(
-            data_df,
-            x='period_label',
-            y=['Very Good', 'Good', 'Needs Improvement'],
-            title="Performance Indicators by Reporting Period",
-            labels={'period_label': 'Reporting Period', 'value': 'Count', 'variable': 'Indicator'},
-            barmode='group',
-            color_discrete_map={
-                'Very Good': '#4CAF50',
-                'Good': '#2196F3',
-                'Needs Improvement': '#FF9800'
-            }
-        )
-        
-        fig.update_layout(
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            xaxis=dict(tickangle=45)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
+
+        # Create a grouped bar chart (cached on the data content)
+        st.plotly_chart(_build_period_fig(data_df), use_container_width=True)
+
         # Add a stacked percentage chart
         st.markdown('<div class="sub-header">Relative Distribution of Performance Indicators</div>', unsafe_allow_html=True)
-        
-        # Calculate percentages
-        data_df_pct = data_df.copy()
-        # Convert columns to float type before performing percentage calculations
-        data_df_pct[['Very Good', 'Good', 'Needs Improvement']] = data_df_pct[['Very Good', 'Good', 'Needs Improvement']].astype(float)
-        
-        for idx, row in data_df_pct.iterrows():
-            total = row['Very Good'] + row['Good'] + row['Needs Improvement']
-            if total > 0:
-                data_df_pct.at[idx, 'Very Good'] = row['Very Good'] / total * 100
-                data_df_pct.at[idx, 'Good'] = row['Good'] / total * 100
-                data_df_pct.at[idx, 'Needs Improvement'] = row['Needs Improvement'] / total * 100
-        
-        # Create stacked percentage bar chart
-        fig = px.bar(
-            data_df_pct,
-            x='period_label',
-            y=['Very Good', 'Good', 'Needs Improvement'],
-            title="Percentage Distribution of Performance Indicators",
-            labels={'period_label': 'Reporting Period', 'value': 'Percentage', 'variable': 'Indicator'},
-            barmode='stack',
-            color_discrete_map={
-                'Very Good': '#4CAF50',
-                'Good': '#2196F3',
-                'Needs Improvement': '#FF9800'
-            }
-        )
-        
-        fig.update_layout(
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            xaxis=dict(tickangle=45),
-            yaxis=dict(ticksuffix="%")
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+
+        # Create stacked percentage bar chart (cached on the data content)
+        st.plotly_chart(_build_pct_fig(data_df), use_container_width=True)
     
     with tab3:
         st.markdown('<div class="sub-header">Raw Data</div>', unsafe_allow_html=True)
@@ -248,8 +274,10 @@ def generate_charts(data_df):
         # Add debug information
         with st.expander("Debug Information"):
             st.write("Raw Performance Indicator Counts:")
-            for idx, row in data_df.iterrows():
-                st.write(f"File {idx+1}: Very Good: {row['Very Good']}, Good: {row['Good']}, Needs Improvement: {row['Needs Improvement']}")
+            st.dataframe(
+                data_df[['Very Good', 'Good', 'Needs Improvement']],
+                use_container_width=True
+            )
 
 def main():
     """Main application function"""
@@ -281,8 +309,10 @@ def main():
         # Add a button to clear session data
         if st.button("Clear All Data"):
             st.session_state.uploaded_files = []
+            st.session_state.uploaded_names = set()
             st.session_state.file_hashes = set()
             st.session_state.extracted_data = []
+            st.session_state.data_df = None
             # Generate a new key for the file uploader to force it to reset
             st.session_state.uploader_key = int(time.time())
             st.rerun()
@@ -310,48 +340,70 @@ def main():
             uploaded_files = uploaded_files[:MAX_FILES]
         
         with st.spinner("Processing PDF files..."):
-            # Process each uploaded file
+            # Filter out already-processed and oversized files before dispatching
+            jobs = []
             for uploaded_file in uploaded_files:
                 # Skip if file has already been processed
-                if uploaded_file.name in [f.name for f in st.session_state.uploaded_files]:
+                if uploaded_file.name in st.session_state.uploaded_names:
                     continue
-                
+
                 # Check file size
                 if uploaded_file.size > MAX_FILE_SIZE:
                     st.error(f"File '{uploaded_file.name}' exceeds the maximum size limit of {MAX_FILE_SIZE/1024/1024:.1f}MB.")
                     continue
-                
-                # Process the PDF
-                try:
-                    file_bytes = uploaded_file.getvalue()
-                    result, error = pdf_processor.process_pdf(
-                        file_bytes, 
-                        uploaded_file.name,
-                        st.session_state.file_hashes
-                    )
-                    
-                    if error:
-                        st.error(error)
-                    else:
-                        # Add to session state
-                        st.session_state.uploaded_files.append(uploaded_file)
-                        st.session_state.file_hashes.add(result['file_hash'])
-                        st.session_state.extracted_data.append(result)
-                        
-                        # Clear memory
-                        del file_bytes
-                except Exception as e:
-                    st.error(f"Error processing '{uploaded_file.name}': {str(e)}")
+
+                # Hash up front so duplicates skip processing entirely
+                file_bytes = uploaded_file.getvalue()
+                file_hash = pdf_processor.calculate_file_hash(file_bytes)
+                if file_hash in st.session_state.file_hashes or file_hash in {h for _, h, _ in jobs}:
+                    st.error("This file has already been uploaded in this session.")
+                    continue
+
+                jobs.append((uploaded_file, file_hash, file_bytes))
+
+            if jobs:
+                # PyMuPDF releases the GIL while parsing, so threads overlap the
+                # per-file work; results are merged back in the main thread
+                with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as executor:
+                    futures = {
+                        executor.submit(_cached_process, file_hash, file_bytes): (uploaded_file, file_hash)
+                        for uploaded_file, file_hash, file_bytes in jobs
+                    }
+
+                    for future in as_completed(futures):
+                        uploaded_file, file_hash = futures[future]
+                        try:
+                            result, error = future.result()
+                        except Exception as e:
+                            st.error(f"Error processing '{uploaded_file.name}': {str(e)}")
+                            continue
+
+                        if error:
+                            st.error(f"'{uploaded_file.name}': {error}")
+                        else:
+                            # Add to session state - keep only the metadata we use,
+                            # not the UploadedFile object with its pinned buffer
+                            st.session_state.uploaded_files.append({'name': uploaded_file.name, 'size': uploaded_file.size})
+                            st.session_state.uploaded_names.add(uploaded_file.name)
+                            st.session_state.file_hashes.add(file_hash)
+                            st.session_state.extracted_data.append({**result, 'file_hash': file_hash})
+
+                # Streamlit retains objects across reruns, so drop the batch's
+                # PDF buffers and force a collection to bound session memory
+                jobs.clear()
+                gc.collect()
         
         # Display success message
         if st.session_state.extracted_data:
             st.success(f"Successfully processed {len(st.session_state.uploaded_files)} files.")
             
-            # Convert data to DataFrame
-            data_df = pd.DataFrame(st.session_state.extracted_data)
-            
+            # Rebuild the DataFrame only when new rows have arrived
+            if (st.session_state.data_df is None
+                    or len(st.session_state.data_df) != len(st.session_state.extracted_data)):
+                st.session_state.data_df = pd.DataFrame(st.session_state.extracted_data)
+
             # Generate charts
-            generate_charts(data_df)
+            generate_charts(st.session_state.data_df)
     
     # Add footer
     st.markdown('<div class="footer">School Reports Analytics - Privacy-Focused Analysis Tool</div>', unsafe_allow_html=True)
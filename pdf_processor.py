@@ -1,63 +1,77 @@
 import pymupdf
+import numpy as np
 import re
 import hashlib
 import datetime
 import logging
 
+try:
+    import numba
+except ImportError:
+    # numba is optional - without it the NumPy counting path is used
+    numba = None
+
+# Combined pattern: "Semester X, YYYY - Progress Report Z", compiled once at import
+_COMBINED_RE = re.compile(r"Semester\s*(\d),?\s*(\d{4})\s*-\s*Progress\s*Report\s*(\d)", re.IGNORECASE)
+
+# Text is only scanned for the metadata pattern, so ligature preservation
+# is unnecessary work (ligatures are expanded to plain characters instead)
+_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_LIGATURES
+
 def calculate_file_hash(file_bytes):
-    """Calculate SHA256 hash of a file"""
-    return hashlib.sha256(file_bytes).hexdigest()
+    """Calculate a hash of a file for duplicate detection"""
+    # blake2b is faster than SHA-256 and plenty for in-session dedupe
+    return hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
 
-def extract_text_from_pdf(file_bytes):
-    """Extract text from PDF using PyMuPDF"""
+def _collect_table_rows(page, all_table_rows):
+    """Collect assessment-table rows from a single page"""
     try:
-        # Use PyMuPDF only
-        pdf_document = pymupdf.open(stream=file_bytes, filetype="pdf")
-        pdf_text = ""
-        
-        # Extract text from all pages
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            pdf_text += page.get_text()
-            
-        # Close the document to free resources
-        pdf_document.close()
-            
-        return pdf_text
+        table_search = page.find_tables()
+        if table_search.tables:
+            for table in table_search.tables:
+                table_rows = table.extract()
+                if table_rows and len(table_rows) > 0 and "Areas Of Assessment" in str(table_rows[0]):
+                    # Skip the first two rows (headers) and keep the rest
+                    all_table_rows.extend(table_rows[2:])
     except Exception as e:
-        # No fallback - if PyMuPDF fails, return the error
-        raise Exception(f"Failed to extract text with PyMuPDF: {str(e)}")
+        # Silently handle table extraction errors
+        pass
 
-def extract_tables_from_pdf(file_bytes):
-    """Extract tables from PDF using PyMuPDF"""
-    try:
-        # Open the PDF document
-        pdf_document = pymupdf.open(stream=file_bytes, filetype="pdf")
-        
-        # Extract tables from all pages
-        all_table_rows = []
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document[page_num]
-            try:
-                table_search = page.find_tables()
-                if table_search.tables:
-                    for table in table_search.tables:
-                        table_rows = table.extract()
-                        if table_rows and len(table_rows) > 0 and "Areas Of Assessment" in str(table_rows[0]):
-                            # Skip the first two rows (headers) and return the rest
-                            all_table_rows.extend(table_rows[2:])
-            except Exception as e:
-                # Silently handle table extraction errors
+def _extract_report_data(pdf_document):
+    """Extract metadata and assessment-table rows in one pass over the pages
+
+    Table extraction is deferred until the metadata pattern has matched, so
+    PDFs that will be rejected never pay for find_tables.
+    """
+    metadata = None
+    text_parts = []
+    all_table_rows = []
+    pages_awaiting_tables = []
+
+    for page_num in range(len(pdf_document)):
+        page = pdf_document.load_page(page_num)
+
+        # Scan page text for the metadata pattern until it matches
+        if metadata is None:
+            page_text = page.get_text("text", flags=_TEXT_FLAGS)
+            text_parts.append(page_text)
+            metadata = extract_metadata_from_content(page_text)
+            if metadata is None:
+                # Reports carry the header on the first page, so a first page
+                # without these keywords will never match - stop scanning
+                if page_num == 0 and ("Semester" not in page_text or "Progress Report" not in page_text):
+                    break
+                # Not eligible yet - hold this page's table work back
+                pages_awaiting_tables.append(page_num)
                 continue
-        
-        # Close the document to free resources
-        pdf_document.close()
-        
-        return all_table_rows
-    except Exception as e:
-        # Log error but don't print to console
-        return []
+            # Catch up on the pages scanned before the pattern matched
+            for earlier_num in pages_awaiting_tables:
+                _collect_table_rows(pdf_document.load_page(earlier_num), all_table_rows)
+            pages_awaiting_tables = []
+
+        _collect_table_rows(page, all_table_rows)
+
+    return metadata, all_table_rows, "".join(text_parts)
 
 def extract_metadata_from_content(pdf_text):
     """Extract metadata from the PDF content"""
@@ -68,13 +82,13 @@ def extract_metadata_from_content(pdf_text):
     }
     
     # Look for the combined pattern: "Semester X, YYYY - Progress Report Z"
-    combined_pattern = r"Semester\s*(\d),?\s*(\d{4})\s*-\s*Progress\s*Report\s*(\d)"
-    combined_match = re.search(combined_pattern, pdf_text, re.IGNORECASE)
+    combined_match = _COMBINED_RE.search(pdf_text)
     
     if combined_match:
-        metadata['semester'] = combined_match.group(1)
-        metadata['year'] = combined_match.group(2)
-        metadata['report_number'] = combined_match.group(3)
+        # Convert to int here so downstream DataFrames infer numeric dtypes
+        metadata['semester'] = int(combined_match.group(1))
+        metadata['year'] = int(combined_match.group(2))
+        metadata['report_number'] = int(combined_match.group(3))
         
         # Add full_period
         metadata['full_period'] = f"{metadata['year']} S{metadata['semester']} R{metadata['report_number']}"
@@ -84,34 +98,92 @@ def extract_metadata_from_content(pdf_text):
         # If the combined pattern isn't found, return None to indicate this PDF should be ignored
         return None
 
+# Category search terms as byte arrays for the numba kernel
+_VERY_GOOD_PAT = np.frombuffer(b"very good", dtype=np.uint8)
+_GOOD_PAT = np.frombuffer(b"good (meets expectations)", dtype=np.uint8)
+_NI_PATS = (
+    np.frombuffer(b"needs improvement", dtype=np.uint8),
+    np.frombuffer(b"improvement needed", dtype=np.uint8),
+    np.frombuffer(b"not consistently meeting expectation", dtype=np.uint8),
+)
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _buf_contains(buf, start, end, pattern):
+        """Check whether pattern occurs in buf[start:end]"""
+        plen = pattern.shape[0]
+        for i in range(start, end - plen + 1):
+            found = True
+            for j in range(plen):
+                if buf[i + j] != pattern[j]:
+                    found = False
+                    break
+            if found:
+                return True
+        return False
+
+    @numba.njit(cache=True)
+    def _count_indicators_jit(buf, offsets, vg, g, ni1, ni2, ni3):
+        """Classify each NUL-separated cell in buf into three counters"""
+        counts = np.zeros(3, dtype=np.int64)
+        for k in range(offsets.shape[0] - 1):
+            start = offsets[k]
+            end = offsets[k + 1] - 1  # drop the NUL separator
+            if _buf_contains(buf, start, end, vg):
+                counts[0] += 1
+            elif _buf_contains(buf, start, end, g):
+                counts[1] += 1
+            elif (_buf_contains(buf, start, end, ni1)
+                    or _buf_contains(buf, start, end, ni2)
+                    or _buf_contains(buf, start, end, ni3)):
+                counts[2] += 1
+        return counts
+
+def _count_indicators_numpy(cell_texts):
+    """Count indicator categories with vectorized substring searches"""
+    cells = np.array(cell_texts, dtype=np.str_)
+
+    # Later categories exclude earlier matches so each cell is counted once
+    very_good = np.char.find(cells, 'very good') >= 0
+    good = (np.char.find(cells, 'good (meets expectations)') >= 0) & ~very_good
+    needs_improvement = (
+        (np.char.find(cells, 'needs improvement') >= 0)
+        | (np.char.find(cells, 'improvement needed') >= 0)
+        | (np.char.find(cells, 'not consistently meeting expectation') >= 0)
+    ) & ~very_good & ~good
+
+    return int(very_good.sum()), int(good.sum()), int(needs_improvement.sum())
+
 def extract_performance_indicators_from_tables(table_rows):
     """Extract performance indicators from table rows"""
-    very_good_count = 0
-    good_count = 0
-    needs_improvement_count = 0
-    
-    # Process each row in the table
-    for row in table_rows:
-        if not row or len(row) < 2:  # Skip rows that don't have enough columns
-            continue
-        
-        # Each row represents a subject, and columns 1-5 contain assessment results
-        # Skip the first column (subject name) and check columns 1-5
-        for cell in row[1:]:  # Start from index 1 to skip the subject column
-            cell_text = str(cell).lower().strip() if cell else ""
-            
-            # Count based on the cell content
-            if "very good" in cell_text:
-                very_good_count += 1
-            elif "good (meets expectations)" in cell_text:
-                good_count += 1
-            elif any(term in cell_text for term in ["needs improvement", "improvement needed", "not consistently meeting expectation"]):
-                needs_improvement_count += 1
-    
+    # Flatten all assessment cells, skipping the subject column
+    cell_texts = [str(cell).lower() for row in table_rows for cell in row[1:] if cell]
+
+    if not cell_texts:
+        return {'Very Good': 0, 'Good': 0, 'Needs Improvement': 0}
+
+    if numba is not None:
+        # Pack the cells into one NUL-separated byte buffer with offsets and
+        # let the compiled kernel do the scanning
+        encoded = [text.encode('utf-8') for text in cell_texts]
+        buf = np.frombuffer(b"\x00".join(encoded) + b"\x00", dtype=np.uint8)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        position = 0
+        for k, cell in enumerate(encoded):
+            offsets[k] = position
+            position += len(cell) + 1
+        offsets[-1] = position
+        counts = _count_indicators_jit(
+            buf, offsets, _VERY_GOOD_PAT, _GOOD_PAT, *_NI_PATS
+        )
+        very_good, good, needs_improvement = int(counts[0]), int(counts[1]), int(counts[2])
+    else:
+        very_good, good, needs_improvement = _count_indicators_numpy(cell_texts)
+
     return {
-        'Very Good': very_good_count,
-        'Good': good_count,
-        'Needs Improvement': needs_improvement_count
+        'Very Good': very_good,
+        'Good': good,
+        'Needs Improvement': needs_improvement
     }
 
 def process_pdf(file_bytes, filename, existing_hashes=None):
@@ -128,40 +200,60 @@ def process_pdf(file_bytes, filename, existing_hashes=None):
     """
     # Calculate hash to check for duplicates
     file_hash = calculate_file_hash(file_bytes)
-    
+
     # Check if file has already been uploaded
     if existing_hashes and file_hash in existing_hashes:
         return None, "This file has already been uploaded in this session."
-    
+
     # Process PDF content
+    result, error = _process_pdf_core(file_bytes)
+
+    if error:
+        return None, f"'{filename}': {error}"
+
+    result['file_hash'] = file_hash
+    return result, None
+
+def _process_pdf_core(file_bytes):
+    """
+    Extract metadata and performance indicators from PDF content
+
+    Depends only on the file bytes - no filename or duplicate handling -
+    so results can be cached keyed on the file's content.
+
+    Args:
+        file_bytes: The PDF file as bytes
+
+    Returns:
+        tuple: (result_dict, error_message)
+    """
     try:
-        # Extract full text for metadata
-        pdf_text = extract_text_from_pdf(file_bytes)
-        
-        # Check if PDF text is empty
-        if not pdf_text or pdf_text.isspace():
-            return None, f"The PDF file '{filename}' appears to be empty or contains no extractable text."
-        
-        # Extract metadata from content
-        metadata = extract_metadata_from_content(pdf_text)
-        
-        # If metadata extraction failed, ignore this PDF
-        if metadata is None:
-            return None, f"Could not find required metadata pattern in '{filename}'. PDF ignored."
-        
-        # Extract tables for performance indicators
-        table_rows = extract_tables_from_pdf(file_bytes)
-        
+        # Open the document once and share it between the extraction steps
+        pdf_document = pymupdf.open(stream=file_bytes, filetype="pdf")
+        try:
+            # Extract metadata and tables in a single pass over the pages
+            metadata, table_rows, pdf_text = _extract_report_data(pdf_document)
+
+            # If metadata extraction failed, ignore this PDF
+            if metadata is None:
+                # Distinguish an empty PDF from one missing the pattern
+                if not pdf_text or pdf_text.isspace():
+                    return None, "The PDF appears to be empty or contains no extractable text."
+                return None, "Could not find required metadata pattern. PDF ignored."
+        finally:
+            # Close the document to free resources
+            pdf_document.close()
+
         if table_rows and len(table_rows) > 0:
             # Use table extraction for performance indicators
             performance = extract_performance_indicators_from_tables(table_rows)
         else:
             # If no tables were found, return an error
-            return None, f"No assessment tables found in the PDF file '{filename}'."
-        
+            return None, "No assessment tables found in the PDF."
+
         # Combine metadata and performance data
-        result = {**metadata, **performance, 'file_hash': file_hash}
+        result = {**metadata, **performance}
         return result, None
-        
+
     except Exception as e:
         return None, f"Error processing PDF: {str(e)}" 
\ No newline at end of file